@@ -1,10 +1,22 @@
 #!/usr/bin/env python3
 
 import argparse
-import json
+from concurrent.futures import ProcessPoolExecutor
+try:
+    import orjson
+    _ORJSON_BUFFERS = True # orjson can parse a memoryview without copying it
+except ImportError:
+    import json as orjson
+    _ORJSON_BUFFERS = False
 from datetime import datetime, timezone, time
+import functools
+import logging
+import mmap
+from itertools import chain
+import operator
 import os
-import textwrap
+import re
+import sys
 from zoneinfo import ZoneInfo
 from tzlocal import get_localzone
 try:
@@ -12,6 +24,29 @@ try:
 except ImportError:
     get_localzone_name = lambda: str(get_localzone())
 
+log = logging.getLogger(__name__)
+
+# Resolving the local zone probes the filesystem, so do it once per run.
+_LOCAL_TZ = get_localzone()
+_TZ_NAME = get_localzone_name()
+
+_get_name = operator.itemgetter("RecipeName")
+
+# Fixed lines wrapping every calendar.
+_CAL_HEADER = (
+    "BEGIN:VCALENDAR",
+    "VERSION:2.0",
+    "PRODID:-//GeminiCodeAssist//LINQ to ICS//EN",
+)
+_CAL_FOOTER = "END:VCALENDAR"
+
+# Menu dates are M/D/YYYY.
+_DATE_RE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+
+# Characters that must be backslash-escaped in ICS TEXT values. CR is a
+# control character TEXT can't carry, so CRLF becomes a single \n escape.
+_ICS_ESCAPE = str.maketrans({",": r"\,", ";": r"\;", "\\": r"\\", "\n": r"\n", "\r": ""})
+
 
 def get_meal_times(meal_name):
     """Returns start and end time strings for a given meal."""
@@ -22,6 +57,29 @@ def get_meal_times(meal_name):
     }
     return times.get(meal_name, (None, None))
 
+def _date_to_yyyymmdd(date_str):
+    """
+    Converts an M/D/YYYY date string to YYYYMMDD.
+    Returns None if the value is not a valid date.
+    """
+    if not isinstance(date_str, str):
+        return None
+    return _parse_date(date_str)
+
+@functools.lru_cache(maxsize=None)
+def _parse_date(date_str):
+    """Cached worker for _date_to_yyyymmdd."""
+    m = _DATE_RE.fullmatch(date_str)
+    if not m:
+        return None
+    month, day, year = map(int, m.groups())
+    try:
+        # Rejects out-of-range months and days such as 13/45 or 2/30.
+        datetime(year, month, day)
+    except ValueError:
+        return None
+    return f"{year:04d}{month:02d}{day:02d}"
+
 def get_main_entrees(menu_meals):
     """Extracts main entree items for the event summary."""
     entrees = []
@@ -46,55 +104,78 @@ def format_description(menu_meals):
 
     for meal in menu_meals:
         meal_name = meal.get("MenuMealName", "")
-        # Convert recipe names to title case for better readability.
-        recipes = [
-            recipe["RecipeName"].title()
-            for category in meal.get("RecipeCategories", [])
-            for recipe in category.get("Recipes", [])
-        ]
 
         # Main entrees are now in the summary, so we exclude them from the description.
         if "Daily Special" in meal_name or "Entree" in meal_name:
             continue
-        elif "Milk" in meal_name:
-            milk.extend(recipes)
-        else:
-            other.extend(recipes)
 
-    description_parts = []
-    if other:
-        description_parts.extend(f"- {o}" for o in other)
+        # Convert recipe names to title case for better readability.
+        cats = meal.get("RecipeCategories") or ()
+        recipes = [
+            name.title().translate(_ICS_ESCAPE)
+            for name in map(_get_name, chain.from_iterable(c.get("Recipes", ()) for c in cats))
+        ]
 
-    if milk:
-        description_parts.extend(f"- {m}" for m in milk)
+        if "Milk" in meal_name:
+            milk.extend(map("- ".__add__, recipes))
+        else:
+            other.extend(map("- ".__add__, recipes))
 
-    # textwrap.fill is used for proper folding in ICS
-    return "\\n".join(textwrap.fill(line, 72) for line in description_parts)
+    other.extend(milk)
+    # Folding happens once over the full DESCRIPTION line in create_ics_event.
+    return "\\n".join(other)
+
+def _ics_fold(line):
+    """
+    Folds a content line so that no physical line exceeds 75 UTF-8 octets,
+    as required by RFC 5545. Continuation lines start with a space, so they
+    carry at most 74 octets of content. Multibyte characters are never split.
+    """
+    parts = []
+    limit = 75
+    if line.isascii():
+        # One octet per character, so plain slicing is exact.
+        i = 0
+        while i < len(line):
+            parts.append(line[i:i + limit])
+            i += limit
+            limit = 74
+    else:
+        start = 0
+        size = 0
+        for i, ch in enumerate(line):
+            width = len(ch.encode("utf-8"))
+            if size + width > limit:
+                parts.append(line[start:i])
+                start = i
+                size = 0
+                limit = 74
+            size += width
+        parts.append(line[start:])
+    return "\r\n ".join(parts)
 
 def create_ics_event(uid, dtstamp, start_time, end_time, summary, description):
-    """Creates a single VEVENT string."""
-    # Get local timezone name for the TZID parameter
-    tz_name = get_localzone_name()
-    return (
-        "BEGIN:VEVENT\n"
-        f"UID:{uid}\n"
-        f"DTSTAMP:{dtstamp}\n"
-        f"DTSTART;TZID={tz_name}:{start_time}\n"
-        f"DTEND;TZID={tz_name}:{end_time}\n"
-        f"SUMMARY:{summary}\n"
-        f"DESCRIPTION:{description}\n"
-        "END:VEVENT\n"
-    )
+    """Returns the content lines of a single VEVENT."""
+    return [
+        "BEGIN:VEVENT",
+        _ics_fold(f"UID:{uid}"),
+        f"DTSTAMP:{dtstamp}",
+        f"DTSTART;TZID={_TZ_NAME}:{start_time}",
+        f"DTEND;TZID={_TZ_NAME}:{end_time}",
+        _ics_fold(f"SUMMARY:{summary}"),
+        _ics_fold(f"DESCRIPTION:{description}"),
+        "END:VEVENT",
+    ]
 
+@functools.lru_cache(maxsize=1)
 def get_vtimezone_component():
     """
-    Generates the VTIMEZONE component for the local timezone.
+    Returns the content lines of the VTIMEZONE component for the local timezone.
     This is a simplified version and may not cover all historical transitions,
-    but it's sufficient for current and future dates.
+    but it's sufficient for current and future dates. The result is cached,
+    so it is only computed once per run.
     """
-    local_tz = get_localzone()
-    tz_name = get_localzone_name()
-    now = datetime.now(local_tz)
+    now = datetime.now(_LOCAL_TZ)
 
     # Get current standard and daylight time transitions if they exist
     try:
@@ -117,102 +198,162 @@ def get_vtimezone_component():
 
     # A basic VTIMEZONE block. For simplicity, we assume DST rules don't change.
     # This works for most modern calendar clients.
-    vtimezone = (
-        "BEGIN:VTIMEZONE\n"
-        f"TZID:{tz_name}\n"
-        "BEGIN:STANDARD\n"
-        "DTSTART:19710101T020000\n"
-        f"TZOFFSETFROM:{dst_offset_str}\n"
-        f"TZOFFSETTO:{std_offset_str}\n"
-        f"TZNAME:{now.tzname()}\n"
-        "END:STANDARD\n"
-    )
+    vtimezone = [
+        "BEGIN:VTIMEZONE",
+        f"TZID:{_TZ_NAME}",
+        "BEGIN:STANDARD",
+        "DTSTART:19710101T020000",
+        f"TZOFFSETFROM:{dst_offset_str}",
+        f"TZOFFSETTO:{std_offset_str}",
+        f"TZNAME:{now.tzname()}",
+        "END:STANDARD",
+    ]
     if std_offset != dst_offset:
-        vtimezone += (
-            "BEGIN:DAYLIGHT\n"
-            "DTSTART:19710314T020000\n" # Example start, not universally correct but works
-            f"TZOFFSETFROM:{std_offset_str}\n"
-            f"TZOFFSETTO:{dst_offset_str}\n"
-            f"TZNAME:{now.tzname()}\n"
-            "END:DAYLIGHT\n"
-        )
-    vtimezone += "END:VTIMEZONE\n"
-    return vtimezone
+        vtimezone.extend([
+            "BEGIN:DAYLIGHT",
+            "DTSTART:19710314T020000", # Example start, not universally correct but works
+            f"TZOFFSETFROM:{std_offset_str}",
+            f"TZOFFSETTO:{dst_offset_str}",
+            f"TZNAME:{now.tzname()}",
+            "END:DAYLIGHT",
+        ])
+    vtimezone.append("END:VTIMEZONE")
+    # A tuple, so callers can't mutate the cached value.
+    return tuple(vtimezone)
+
+def _load_json(f):
+    """Parses an open binary JSON file, mapping it into memory when possible."""
+    if _ORJSON_BUFFERS:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError): # Empty files and pipes can't be mapped
+            pass
+        else:
+            with mm, memoryview(mm) as view:
+                return orjson.loads(view)
+    return orjson.loads(f.read())
 
 def process_json_file(filepath):
-    """Reads a JSON file and returns its content as an ICS string."""
-    print(f"Processing {filepath}...")
+    """Reads a JSON file and returns its content as UTF-8 encoded ICS bytes."""
+    log.debug("Processing %s...", filepath)
     try:
-        with open(filepath, 'r') as f:
-            data = json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError) as e:
-        print(f"Error reading or parsing {filepath}: {e}")
+        # orjson wants bytes; reading in binary also skips the text decode pass.
+        with open(filepath, 'rb') as f:
+            data = _load_json(f)
+    except (orjson.JSONDecodeError, FileNotFoundError) as e:
+        log.error("Error reading or parsing %s: %s", filepath, e)
         return None
 
-    ics_events = []
     dtstamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    basename = os.path.basename(filepath)
+    calendar_name = os.path.splitext(basename)[0]
+
+    parts = list(_CAL_HEADER)
+    parts.append(_ics_fold(f"X-WR-CALNAME:{calendar_name}"))
+    parts.extend(get_vtimezone_component())
+    header_len = len(parts)
 
     for session in data.get("FamilyMenuSessions", []):
         serving_session = session.get("ServingSession")
+        if not isinstance(serving_session, str):
+            continue
         start_hhmmss, end_hhmmss = get_meal_times(serving_session)
 
         if not start_hhmmss:
             continue
 
+        # Only a few distinct sessions exist, so share one copy of each name.
+        serving_session = sys.intern(serving_session)
+
         for plan in session.get("MenuPlans", []):
+            uid_suffix = f"-{serving_session}-{plan.get('MenuPlanId', '')}@{basename}"
             for day in plan.get("Days", []):
+                # Days without meals (weekends, holidays) get no event.
+                menu_meals = day.get("MenuMeals") or ()
+                if not menu_meals:
+                    continue
+
                 date_str = day.get("Date")
-                try:
-                    # Handles M/D/YYYY format
-                    date_obj = datetime.strptime(date_str, "%m/%d/%Y")
-                    date_yyyymmdd = date_obj.strftime("%Y%m%d")
-                except (ValueError, TypeError):
-                    print(f"Skipping invalid date: {date_str}")
+                date_yyyymmdd = _date_to_yyyymmdd(date_str)
+                if not date_yyyymmdd:
+                    log.warning("Skipping invalid date: %s", date_str)
                     continue
 
-                menu_meals = day.get("MenuMeals", [])
                 main_entrees = get_main_entrees(menu_meals)
 
-                start_time = f"{date_yyyymmdd}T{start_hhmmss}"
-                end_time = f"{date_yyyymmdd}T{end_hhmmss}"
+                start_time = "T".join((date_yyyymmdd, start_hhmmss))
+                end_time = "T".join((date_yyyymmdd, end_hhmmss))
                 summary = ", ".join(main_entrees) if main_entrees else serving_session
+                summary = summary.translate(_ICS_ESCAPE)
                 description = format_description(menu_meals)
                 
                 # Create a unique ID for the event
-                uid = f"{date_yyyymmdd}-{serving_session}-{plan.get('MenuPlanId', '')}@{os.path.basename(filepath)}"
+                uid = date_yyyymmdd + uid_suffix
 
-                ics_events.append(create_ics_event(uid, dtstamp, start_time, end_time, summary, description))
+                parts.extend(create_ics_event(uid, dtstamp, start_time, end_time, summary, description))
 
-    if not ics_events:
+    if len(parts) == header_len:
         return None
 
-    vtimezone_block = get_vtimezone_component()
-    calendar_name = os.path.splitext(os.path.basename(filepath))[0]
+    parts.append(_CAL_FOOTER)
+
+    # RFC 5545 requires CRLF line endings, including after the last line.
+    parts.append("")
+    return "\r\n".join(parts).encode("utf-8")
+
+def ics_path_for(json_file):
+    """Returns the path of the ICS file written alongside a JSON file."""
+    input_dir = os.path.dirname(json_file)
+    basename = os.path.splitext(os.path.basename(json_file))[0]
+    ics_filename = f"{basename}.ics"
+    return os.path.join(input_dir, ics_filename)
 
-    return (
-        "BEGIN:VCALENDAR\n"
-        "VERSION:2.0\n"
-        "PRODID:-//GeminiCodeAssist//LINQ to ICS//EN\n"
-        f"X-WR-CALNAME:{calendar_name}\n"
-        + vtimezone_block + "".join(ics_events) +
-        "END:VCALENDAR\n"
-    )
+def convert_file(json_file):
+    """
+    Converts a JSON file to an ICS file alongside it.
+    Returns the path of the written file, or None if nothing was written.
+    """
+    ics_content = process_json_file(json_file)
+    if not ics_content:
+        return None
+    ics_filepath = ics_path_for(json_file)
+    with open(ics_filepath, 'wb') as f:
+        f.write(ics_content)
+    return ics_filepath
 
 def main():
     parser = argparse.ArgumentParser(description="Convert school meal JSON files to ICS calendar files.")
     parser.add_argument("json_files", nargs='+', help="One or more JSON files to process.")
     args = parser.parse_args()
+    logging.basicConfig(format="%(message)s")
 
+    # Workers write concurrently, so only the last input for each output
+    # path is converted, matching the old sequential overwrite.
+    outputs = {}
     for json_file in args.json_files:
-        ics_content = process_json_file(json_file)
-        if ics_content:
-            input_dir = os.path.dirname(json_file)
-            basename = os.path.splitext(os.path.basename(json_file))[0]
-            ics_filename = f"{basename}.ics"
-            ics_filepath = os.path.join(input_dir, ics_filename)
-            with open(ics_filepath, 'w') as f:
-                f.write(ics_content)
-            print(f"Successfully created {ics_filepath}")
+        ics_filepath = os.path.realpath(ics_path_for(json_file))
+        previous = outputs.pop(ics_filepath, None)
+        if previous is not None:
+            log.warning("Skipping %s: %s writes the same output file", previous, json_file)
+        outputs[ics_filepath] = json_file
+
+    # Each file is independent, so convert and write them in parallel.
+    # Failures are collected per file so one bad input can't abort the rest.
+    failed = False
+    with ProcessPoolExecutor() as executor:
+        futures = [(json_file, executor.submit(convert_file, json_file)) for json_file in outputs.values()]
+        for json_file, future in futures:
+            try:
+                ics_filepath = future.result()
+            except Exception:
+                log.exception("Error converting %s", json_file)
+                failed = True
+                continue
+            if ics_filepath:
+                print(f"Successfully created {ics_filepath}")
+
+    if failed:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file